@@ -5,12 +5,468 @@ from tkinter import messagebox, ttk, filedialog
 import sqlite3
 from pathlib import Path
 import json
+import codecs
+import csv
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import uuid
+from array import array
+from collections.abc import Sequence
+from itertools import islice
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 plt.rcParams["font.sans-serif"] = ["SimHei"]
 plt.rcParams["axes.unicode_minus"] = False
 
+# 单词快照文件格式：文件头(魔数, 数据库站点ID, 单词表版本, 单词数) + 字段偏移表 + 词性空值标记 + UTF-8文本区
+SNAPSHOT_MAGIC = b"VTSNAP03"
+SNAPSHOT_HEADER = struct.Struct("<8s32sQQ")
+
+
+def read_words_version(conn):
+    """单词表版本：(数据库站点ID, 变更日志中 words 的最大序号)
+
+    序号只有单词增删改才会变化；站点ID区分不同的数据库文件，换成另一份序号相同的数据库时快照也会失效。
+    """
+    seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log WHERE tbl = 'words'").fetchone()[0]
+    return get_site_id(conn), seq
+
+
+def write_snapshot(path, rows, version):
+    """将单词列表写成二进制快照（先写临时文件再原子替换）"""
+    path = Path(path)
+    offsets = array('Q', [0])
+    null_pos = bytearray(len(rows))
+    blob = bytearray()
+    for i, (word, pos, meaning) in enumerate(rows):
+        if pos is None:
+            null_pos[i] = 1
+        for field in (word, pos or "", meaning):
+            blob += str(field).encode('utf-8')
+            offsets.append(len(blob))
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            site_id, seq = version
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, site_id.encode('ascii'), seq, len(rows)))
+            f.write(offsets.tobytes())
+            f.write(null_pos)
+            f.write(blob)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class VocabularySnapshot(Sequence):
+    """内存映射的单词快照，按下标即时解码 (word, pos, meaning)，打开耗时与单词数无关"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, site_id, seq, self._count = SNAPSHOT_HEADER.unpack_from(self._mm, 0)
+            self.version = (site_id.decode('ascii'), seq)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("快照格式不匹配")
+            self._offsets_start = SNAPSHOT_HEADER.size
+            self._flags_start = self._offsets_start + (self._count * 3 + 1) * 8
+            self._blob_start = self._flags_start + self._count
+            blob_size = self._offset(self._count * 3)
+            if len(self._mm) != self._blob_start + blob_size:
+                raise ValueError("快照文件不完整")
+        except (struct.error, ValueError):  # UnicodeDecodeError 是 ValueError 的子类
+            self._mm.close()
+            raise ValueError(f"无效的快照文件：{path}")
+
+    def _offset(self, index):
+        return struct.unpack_from("<Q", self._mm, self._offsets_start + index * 8)[0]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("快照下标越界")
+
+        bounds = struct.unpack_from("<4Q", self._mm, self._offsets_start + index * 24)
+        start = self._blob_start
+        word, pos, meaning = (self._mm[start + bounds[i]:start + bounds[i + 1]].decode('utf-8')
+                              for i in range(3))
+        if self._mm[self._flags_start + index]:
+            pos = None
+        return word, pos, meaning
+
+    def copy(self):
+        """快照只读，直接返回自身"""
+        return self
+
+    def close(self):
+        self._mm.close()
+
+
+# 同步用的变更日志：words 以单词为键，history 以 uid 为键；
+# 同步时按 (changed_at, site) 取较大者胜出，保证两端结果一致
+SYNC_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS sync_meta
+       (
+           key   TEXT PRIMARY KEY,
+           value TEXT
+       )""",
+    """CREATE TABLE IF NOT EXISTS sync_state
+       (
+           peer_site TEXT PRIMARY KEY,
+           last_seq  INTEGER NOT NULL -- 已从该站点拉取的最大变更序号
+       )""",
+    """CREATE TABLE IF NOT EXISTS change_log
+       (
+           seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+           tbl        TEXT NOT NULL,
+           row_key    TEXT NOT NULL,
+           op         TEXT NOT NULL, -- upsert 或 delete
+           payload    TEXT,          -- JSON格式的行数据
+           changed_at TEXT NOT NULL,  -- UTC时间，精确到毫秒
+           site       TEXT NOT NULL   -- 产生该变更的数据库站点
+       )""",
+    "CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log (tbl, row_key, changed_at)",
+    "CREATE INDEX IF NOT EXISTS idx_change_log_tbl ON change_log (tbl, seq)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_history_uid ON history (uid)",
+]
+
+SYNC_WORDS_PAYLOAD = "json_object('pos', {0}.pos, 'meaning', {0}.meaning)"
+SYNC_HISTORY_PAYLOAD = ("json_object('test_date', {0}.test_date, 'accuracy', {0}.accuracy, "
+                        "'duration', {0}.duration, 'total_questions', {0}.total_questions, "
+                        "'incorrect_words', {0}.incorrect_words)")
+# 变更时间取 max(当前时间, 该行最新变更时间 + 1毫秒)：即使两台机器时钟不一致，
+# 本地新的修改也一定排在已同步过来的修改之后，两端按同一顺序收敛
+SYNC_LOG_INSERT = """INSERT INTO change_log (tbl, row_key, op, payload, changed_at, site)
+                     SELECT '{tbl}', {key}, '{op}', {payload},
+                            strftime('%Y-%m-%d %H:%M:%f', max(julianday('now'), COALESCE(
+                                (SELECT julianday(MAX(changed_at)) FROM change_log
+                                 WHERE tbl = '{tbl}' AND row_key = {key}), 0) + 1.0 / 86400000)),
+                            (SELECT value FROM sync_meta WHERE key = 'site_id')"""
+
+
+def sync_triggers():
+    """生成记录 words/history 增删改的触发器（应用远端变更时不触发）"""
+    statements = []
+    for tbl, key, payload in (("words", "word", SYNC_WORDS_PAYLOAD), ("history", "uid", SYNC_HISTORY_PAYLOAD)):
+        def log(op, row, body=None):
+            return SYNC_LOG_INSERT.format(tbl=tbl, key=f"{row}.{key}", op=op,
+                                          payload=body.format(row) if body else "NULL")
+
+        for event, body in (
+                ("INSERT", log("upsert", "NEW", payload)),
+                ("UPDATE", f"{log('delete', 'OLD')} WHERE OLD.{key} IS NOT NEW.{key};\n"
+                           f"{log('upsert', 'NEW', payload)}"),
+                ("DELETE", log("delete", "OLD"))):
+            statements.append(f"""CREATE TRIGGER IF NOT EXISTS {tbl}_log_{event.lower()}
+                                  AFTER {event} ON {tbl}
+                                  WHEN NOT EXISTS (SELECT 1 FROM sync_meta WHERE key = 'applying')
+                                  BEGIN
+                                      {body};
+                                  END""")
+    return statements
+
+
+def file_identity(db_path):
+    """数据库文件自身的标识（inode/文件索引 + 创建时间），移动或换机器不变，复制出的新文件则不同"""
+    st = os.stat(db_path)
+    created = getattr(st, 'st_birthtime', st.st_ctime if os.name == 'nt' else 0)
+    return f"{st.st_ino}:{int(created)}"
+
+
+def init_database(db_path, rebind_site=False):
+    """初始化数据库结构及同步所需的变更日志
+
+    rebind_site 为 True 时，若当前文件是另一个数据库的拷贝（文件标识与记录的不同），则重新生成站点ID，
+    避免两份拷贝使用同一站点ID而互相漏同步。
+    """
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""CREATE TABLE IF NOT EXISTS words
+                        (
+                            id
+                            INTEGER
+                            PRIMARY
+                            KEY,
+                            word
+                            TEXT
+                            NOT
+                            NULL
+                            UNIQUE,
+                            pos
+                            TEXT,
+                            meaning
+                            TEXT
+                            NOT
+                            NULL
+                        )""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS history
+                        (
+                            id
+                            INTEGER
+                            PRIMARY
+                            KEY,
+                            test_date
+                            TEXT
+                            NOT
+                            NULL,
+                            accuracy
+                            REAL
+                            NOT
+                            NULL,
+                            duration
+                            TEXT
+                            NOT
+                            NULL,
+                            total_questions
+                            INTEGER
+                            NOT
+                            NULL,
+                            incorrect_words
+                            TEXT -- 存储JSON格式的错误单词列表
+                        )""")
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(history)")]
+        if "uid" not in columns:
+            conn.execute("ALTER TABLE history ADD COLUMN uid TEXT")
+        conn.execute("UPDATE history SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+
+        new_log = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_log'").fetchone() is None
+        for statement in SYNC_SCHEMA + sync_triggers():
+            conn.execute(statement)
+        conn.execute("DELETE FROM sync_meta WHERE key = 'applying'")  # 清理上次中断的同步
+
+        meta = dict(conn.execute("SELECT key, value FROM sync_meta"))
+        identity = file_identity(db_path) if rebind_site else None
+        copied = rebind_site and "site_file" in meta and meta["site_file"] != identity
+        # 仅在文件标识变化时写入，正常启动不产生任何写操作
+        if "site_id" not in meta or copied:
+            conn.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('site_id', ?)",
+                         (uuid.uuid4().hex,))
+        if rebind_site and meta.get("site_file") != identity:
+            conn.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('site_file', ?)",
+                         (identity,))
+            conn.execute("DELETE FROM sync_meta WHERE key = 'site_location'")  # 旧版按位置绑定的记录
+
+        if new_log:
+            # 首次建立日志时为已有数据补记变更，使首次同步能传送完整单词本
+            for tbl, key, payload in (("words", "word", SYNC_WORDS_PAYLOAD),
+                                      ("history", "uid", SYNC_HISTORY_PAYLOAD)):
+                conn.execute(SYNC_LOG_INSERT.format(
+                    tbl=tbl, key=f"{tbl}.{key}", op="upsert", payload=payload.format(tbl)) + f" FROM {tbl}")
+
+
+def get_site_id(conn):
+    return conn.execute("SELECT value FROM sync_meta WHERE key = 'site_id'").fetchone()[0]
+
+
+def apply_sync_change(conn, tbl, key, op, payload):
+    """将一条远端变更写入数据表"""
+    if tbl == "words":
+        if op == "delete":
+            conn.execute("DELETE FROM words WHERE word = ?", (key,))
+        else:
+            data = json.loads(payload)
+            conn.execute("""INSERT INTO words (word, pos, meaning)
+                            VALUES (?, ?, ?)
+                            ON CONFLICT (word) DO UPDATE SET pos = excluded.pos, meaning = excluded.meaning""",
+                         (key, data["pos"], data["meaning"]))
+    elif tbl == "history":
+        if op == "delete":
+            conn.execute("DELETE FROM history WHERE uid = ?", (key,))
+        else:
+            data = json.loads(payload)
+            conn.execute("""INSERT INTO history (uid, test_date, accuracy, duration, total_questions, incorrect_words)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (uid) DO UPDATE SET test_date = excluded.test_date,
+                                                            accuracy = excluded.accuracy,
+                                                            duration = excluded.duration,
+                                                            total_questions = excluded.total_questions,
+                                                            incorrect_words = excluded.incorrect_words""",
+                         (key, data["test_date"], data["accuracy"], data["duration"],
+                          data["total_questions"], data["incorrect_words"]))
+
+
+def pull_changes(target, source):
+    """把 source 自上次同步以来的变更合并进 target，返回实际应用的条数"""
+    target_site = get_site_id(target)
+    source_site = get_site_id(source)
+    row = target.execute("SELECT last_seq FROM sync_state WHERE peer_site = ?", (source_site,)).fetchone()
+    last_seq = row[0] if row else 0
+    max_seq = source.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+    applied = 0
+    target.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('applying', '1')")
+    try:
+        changes = source.execute("""SELECT tbl, row_key, op, payload, changed_at, site
+                                    FROM change_log
+                                    WHERE seq > ? AND seq <= ? AND site != ?
+                                    ORDER BY seq""", (last_seq, max_seq, target_site))
+        for tbl, key, op, payload, changed_at, site in changes:
+            latest = target.execute("""SELECT changed_at, site
+                                       FROM change_log
+                                       WHERE tbl = ? AND row_key = ?
+                                       ORDER BY changed_at DESC, site DESC
+                                       LIMIT 1""", (tbl, key)).fetchone()
+            # 时间戳较新者胜出，时间相同则比较站点ID，两端得出相同结果
+            if latest is not None and latest >= (changed_at, site):
+                continue
+            apply_sync_change(target, tbl, key, op, payload)
+            target.execute("""INSERT INTO change_log (tbl, row_key, op, payload, changed_at, site)
+                              VALUES (?, ?, ?, ?, ?, ?)""", (tbl, key, op, payload, changed_at, site))
+            applied += 1
+        target.execute("INSERT OR REPLACE INTO sync_state (peer_site, last_seq) VALUES (?, ?)",
+                       (source_site, max_seq))
+    finally:
+        target.execute("DELETE FROM sync_meta WHERE key = 'applying'")
+    return applied
+
+
+def sync_databases(local_path, remote_path):
+    """双向同步两个数据库，只交换上次同步以来的变更，返回 (拉取条数, 推送条数)"""
+    if Path(remote_path).exists():
+        with sqlite3.connect(remote_path) as conn:
+            is_vocabulary = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words'").fetchone() is not None
+        if not is_vocabulary:
+            raise ValueError(f"{Path(remote_path).name} 不是单词本数据库")
+    init_database(remote_path)
+    with sqlite3.connect(local_path) as local, sqlite3.connect(remote_path) as remote:
+        if get_site_id(remote) == get_site_id(local):
+            # 对方是本数据库的直接拷贝（例如复制到同步目录），为其生成新的站点ID，否则双方会互相过滤掉变更
+            remote.execute("UPDATE sync_meta SET value = ? WHERE key = 'site_id'", (uuid.uuid4().hex,))
+        pulled = pull_changes(local, remote)
+        pushed = pull_changes(remote, local)
+    return pulled, pushed
+
+
+# 导入管道：各种来源先整理成 (word, pos, meaning)，再统一分批写入数据库
+IMPORT_BATCH_SIZE = 10000
+IMPORT_HEADER_WORDS = ("单词", "word")
+
+
+def column_layout(row):
+    """由表头或第一行数据决定整个文件的列布局：两列为 (单词, 释义)，否则为 (单词, 词性, 释义)"""
+    cells = list(row)
+    while cells and (cells[-1] is None or not str(cells[-1]).strip()):
+        cells.pop()
+    return 2 if len(cells) == 2 else 3
+
+
+def normalize_word_row(row, default_pos="", columns=3):
+    """按列布局把一行原始数据整理成 (word, pos, meaning)，缺少单词或释义的行返回 None"""
+    cells = [str(cell).strip() if cell is not None else "" for cell in row[:columns]]
+    cells += [""] * (columns - len(cells))
+    if columns == 2:
+        (word, meaning), pos = cells, ""
+    else:
+        word, pos, meaning = cells
+    if not word or not meaning:
+        return None
+    return word, pos or default_pos, meaning
+
+
+def detect_encoding(path):
+    """判断文件编码：整个文件都能按UTF-8解码时为UTF-8（含BOM），否则按GBK处理"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, 'rb') as f:
+        head = f.read(len(codecs.BOM_UTF8))
+        encoding = "utf-8-sig" if head == codecs.BOM_UTF8 else "utf-8"
+        try:
+            decoder.decode(head)
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                decoder.decode(chunk)
+            decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            return "gb18030"  # GBK 的超集
+    return encoding
+
+
+def iter_delimited_rows(path):
+    """流式读取CSV/TSV词表，兼容 export_text 导出的文本格式"""
+    encoding = detect_encoding(path)
+    with open(path, encoding=encoding, newline='') as f:
+        first_line = f.readline()
+        f.seek(0)
+        tab_separated = "\t" in first_line
+        if tab_separated:
+            reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        else:
+            reader = csv.reader(f)
+
+        columns = None
+        for i, row in enumerate(reader):
+            if not row:
+                continue
+            if i == 0 and row[0].strip().lower() in IMPORT_HEADER_WORDS:
+                columns = column_layout(row)
+                continue
+            if len(row) == 1 and row[0].strip() and not row[0].strip("- "):
+                continue  # export_text 写入的分隔线
+            if columns is None:
+                columns = column_layout(row)
+            if tab_separated:
+                while len(row) > columns and not row[-1].strip():
+                    row.pop()
+                if len(row) > columns:
+                    # export_text 不加引号，释义中含有制表符时把多出的字段拼回释义
+                    row = row[:columns - 1] + ["\t".join(row[columns - 1:])]
+            word_row = normalize_word_row(row, columns=columns)
+            if word_row:
+                yield word_row
+
+
+def iter_workbook_rows(wb, sheet_pos):
+    """依次读取选中的工作表，sheet_pos 为 {工作表名: 词性}，单元格无词性时使用工作表对应的词性"""
+    for name, pos in sheet_pos.items():
+        rows = wb[name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            continue
+        columns = column_layout(header)
+        for row in rows:
+            word_row = normalize_word_row(row, pos, columns) if row else None
+            if word_row:
+                yield word_row
+
+
+def insert_words(db_path, rows):
+    """在一个事务中分批写入单词（已存在的单词跳过），返回读取到的记录数"""
+    rows = iter(rows)
+    total = 0
+    with sqlite3.connect(db_path) as conn:
+        # 逐行触发器开销较大，导入期间暂停，结束后按新增行一次性补记变更日志
+        conn.execute("INSERT OR REPLACE INTO sync_meta (key, value) VALUES ('applying', '1')")
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM words").fetchone()[0]
+        while True:
+            batch = list(islice(rows, IMPORT_BATCH_SIZE))
+            if not batch:
+                break
+            conn.executemany("""INSERT OR IGNORE INTO words (word, pos, meaning)
+                              VALUES (?, ?, ?)""", batch)
+            total += len(batch)
+        conn.execute(SYNC_LOG_INSERT.format(tbl="words", key="words.word", op="upsert",
+                                            payload=SYNC_WORDS_PAYLOAD.format("words"))
+                     + " FROM words WHERE words.id > ?", (last_id,))
+        conn.execute("DELETE FROM sync_meta WHERE key = 'applying'")
+    return total
+
 
 class VocabularyTestApp:
     def __init__(self, root):
@@ -21,6 +477,8 @@ class VocabularyTestApp:
         # 初始化变量
         self.mode = tk.StringVar(value="word_to_meaning")
         self.db_path = Path("vocabulary.db")
+        self.snapshot_path = self.db_path.with_suffix(".snapshot")
+        self.snapshot = None  # 当前映射中的单词快照
         self.words = []
         self.history_records = []
         self.current_words_display = []
@@ -64,7 +522,8 @@ class VocabularyTestApp:
             ("📖 生词本", self.show_vocabulary),
             ("📊 统计", self.show_statistics),
             ("📤 导出", self.show_export),
-            ("📥 导入", self.import_excel)
+            ("📥 导入", self.import_file),
+            ("🔄 同步", self.show_sync)
         ]
         for text, cmd in nav_buttons:
             ttk.Button(nav_frame, text=text, command=cmd, style='Nav.TButton').pack(fill=tk.X, pady=2)
@@ -75,61 +534,56 @@ class VocabularyTestApp:
 
     def setup_database(self):
         """初始化数据库结构"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""CREATE TABLE IF NOT EXISTS words
-                            (
-                                id
-                                INTEGER
-                                PRIMARY
-                                KEY,
-                                word
-                                TEXT
-                                NOT
-                                NULL
-                                UNIQUE,
-                                pos
-                                TEXT,
-                                meaning
-                                TEXT
-                                NOT
-                                NULL
-                            )""")
-            conn.execute("""CREATE TABLE IF NOT EXISTS history
-                            (
-                                id
-                                INTEGER
-                                PRIMARY
-                                KEY,
-                                test_date
-                                TEXT
-                                NOT
-                                NULL,
-                                accuracy
-                                REAL
-                                NOT
-                                NULL,
-                                duration
-                                TEXT
-                                NOT
-                                NULL,
-                                total_questions
-                                INTEGER
-                                NOT
-                                NULL,
-                                incorrect_words
-                                TEXT -- 存储JSON格式的错误单词列表
-                            )""")
+        init_database(self.db_path, rebind_site=True)
 
     def load_data(self):
         """从数据库加载数据"""
+        self.words = self.load_words()
         with sqlite3.connect(self.db_path) as conn:
-            self.words = conn.execute("SELECT word, pos, meaning FROM words").fetchall()
             self.history_records = conn.execute(
                 """SELECT test_date, accuracy, duration, total_questions, incorrect_words
                    FROM history
                                                    ORDER BY test_date DESC""").fetchall()
         self.current_words_display = self.words.copy()
 
+    def load_words(self):
+        """加载单词表：快照与单词表版本一致时直接映射，否则查询数据库并在后台重建快照"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            version = read_words_version(conn)
+            if self.snapshot is not None:
+                if self.snapshot.version == version:
+                    return self.snapshot
+                self.snapshot.close()
+                self.snapshot = None
+
+            try:
+                snapshot = VocabularySnapshot(self.snapshot_path)
+            except (OSError, ValueError):
+                snapshot = None
+            if snapshot is not None:
+                if snapshot.version == version:
+                    self.snapshot = snapshot
+                    return snapshot
+                snapshot.close()
+
+            # 在同一读事务内读取版本，保证快照与查询结果对应同一版本
+            conn.execute("BEGIN")
+            version = read_words_version(conn)
+            words = conn.execute("SELECT word, pos, meaning FROM words").fetchall()
+        finally:
+            conn.close()
+
+        threading.Thread(target=self.rebuild_snapshot, args=(words, version), daemon=True).start()
+        return words
+
+    def rebuild_snapshot(self, words, version):
+        """后台重建单词快照，失败时下次启动仍走数据库查询"""
+        try:
+            write_snapshot(self.snapshot_path, words, version)
+        except OSError:
+            pass
+
     def clear_content(self):
         """清空内容区域"""
         for widget in self.main_content.winfo_children():
@@ -351,9 +805,10 @@ class VocabularyTestApp:
         # 保存历史记录
         incorrect_data = json.dumps(self.incorrect_words) if self.incorrect_words else None
         with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""INSERT INTO history (test_date, accuracy, duration, total_questions, incorrect_words)
-                            VALUES (?, ?, ?, ?, ?)""",
-                         (datetime.now().strftime("%Y-%m-%d %H:%M"),
+            conn.execute("""INSERT INTO history (uid, test_date, accuracy, duration, total_questions, incorrect_words)
+                            VALUES (?, ?, ?, ?, ?, ?)""",
+                         (uuid.uuid4().hex,
+                          datetime.now().strftime("%Y-%m-%d %H:%M"),
                           accuracy,
                           duration,
                           total,
@@ -672,44 +1127,135 @@ class VocabularyTestApp:
                 f.write("单词\t词性\t释义\n")
                 f.write("-" * 50 + "\n")
                 for word, pos, meaning in self.words:
-                    f.write(f"{word}\t{pos}\t{meaning}\n")
+                    f.write(f"{word}\t{pos or ''}\t{meaning}\n")
             messagebox.showinfo("成功", f"已导出到 {path}")
         except Exception as e:
             messagebox.showerror("错误", f"导出失败：{str(e)}")
 
     # 导入模块 ----------------------------------------------------------
-    def import_excel(self):
-        """导入Excel数据"""
+    def import_file(self):
+        """导入单词（Excel工作簿或CSV/TSV/文本词表）"""
+        path = filedialog.askopenfilename(filetypes=[("词表文件", "*.xlsx *.csv *.tsv *.txt"),
+                                                     ("Excel文件", "*.xlsx"),
+                                                     ("CSV/TSV文件", "*.csv *.tsv *.txt")])
+        if not path: return
+
+        if Path(path).suffix.lower() == ".xlsx":
+            self.import_excel(path)
+        else:
+            self.run_import(lambda: insert_words(self.db_path, iter_delimited_rows(path)))
+
+    def import_excel(self, path):
+        """导入Excel数据，多工作表时先选择要导入的工作表"""
         try:
             from openpyxl import load_workbook
         except ImportError:
             messagebox.showerror("错误", "请先安装openpyxl库：pip install openpyxl")
             return
 
-        path = filedialog.askopenfilename(filetypes=[("Excel文件", "*.xlsx")])
-        if not path: return
-
         try:
-            wb = load_workbook(path)
-            ws = wb.active
-            new_words = []
-            for row in ws.iter_rows(min_row=2, values_only=True):
-                if row and row[0]:
-                    new_words.append((
-                        str(row[0]).strip(),
-                        str(row[1]).strip() if len(row) > 1 else "",
-                        str(row[2]).strip() if len(row) > 2 else ""
-                    ))
+            wb = load_workbook(path, read_only=True)
+            sheet_names = wb.sheetnames
+            wb.close()
+        except Exception as e:
+            messagebox.showerror("错误", f"导入失败：{str(e)}")
+            return
 
-            with sqlite3.connect(self.db_path) as conn:
-                conn.executemany("""INSERT OR IGNORE INTO words (word, pos, meaning)
-                                  VALUES (?, ?, ?)""", new_words)
+        if len(sheet_names) == 1:
+            self.import_sheets(path, {sheet_names[0]: ""})
+        else:
+            self.show_sheet_dialog(path, sheet_names)
 
+    def show_sheet_dialog(self, path, sheet_names):
+        """显示工作表选择对话框，每个工作表可指定词性"""
+        dialog = tk.Toplevel()
+        dialog.title("选择工作表")
+
+        ttk.Label(dialog, text="工作表").grid(row=0, column=0, padx=5, pady=5)
+        ttk.Label(dialog, text="词性（可选）").grid(row=0, column=1, padx=5, pady=5)
+
+        sheets = {}
+        for i, name in enumerate(sheet_names, start=1):
+            selected = tk.BooleanVar(value=True)
+            ttk.Checkbutton(dialog, text=name, variable=selected).grid(row=i, column=0, padx=5, pady=2, sticky='w')
+            pos_entry = ttk.Entry(dialog)
+            pos_entry.grid(row=i, column=1, padx=5, pady=2)
+            sheets[name] = (selected, pos_entry)
+
+        def submit():
+            sheet_pos = {name: entry.get().strip()
+                         for name, (selected, entry) in sheets.items() if selected.get()}
+            if not sheet_pos:
+                messagebox.showwarning("提示", "请至少选择一个工作表")
+                return
+            dialog.destroy()
+            self.import_sheets(path, sheet_pos)
+
+        ttk.Button(dialog, text="导入", command=submit).grid(row=len(sheet_names) + 1, columnspan=2, pady=10)
+
+    def import_sheets(self, path, sheet_pos):
+        """导入选中的工作表"""
+        from openpyxl import load_workbook
+
+        def read_sheets():
+            wb = load_workbook(path, read_only=True)
+            try:
+                return insert_words(self.db_path, iter_workbook_rows(wb, sheet_pos))
+            finally:
+                wb.close()
+
+        self.run_import(read_sheets)
+
+    def run_import(self, importer):
+        """执行导入并刷新数据"""
+        try:
+            count = importer()
             self.load_data()
-            messagebox.showinfo("成功", f"成功导入 {len(new_words)} 条记录")
+            messagebox.showinfo("成功", f"成功导入 {count} 条记录")
         except Exception as e:
             messagebox.showerror("错误", f"导入失败：{str(e)}")
 
+    # 同步模块 ----------------------------------------------------------
+    def show_sync(self):
+        """显示同步界面"""
+        self.clear_content()
+
+        sync_frame = ttk.LabelFrame(self.main_content, text="同步选项")
+        sync_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        targets = [
+            ("与数据库文件同步 (.db)", self.sync_with_file),
+            ("与同步目录同步", self.sync_with_directory)
+        ]
+
+        for text, cmd in targets:
+            ttk.Button(sync_frame, text=text, command=cmd).pack(pady=5)
+
+    def sync_with_file(self):
+        """与另一个数据库文件同步"""
+        path = filedialog.askopenfilename(filetypes=[("数据库文件", "*.db")])
+        if not path: return
+        self.run_sync(Path(path))
+
+    def sync_with_directory(self):
+        """与目录中的数据库同步（目录相当于服务器，首次同步时自动创建）"""
+        path = filedialog.askdirectory()
+        if not path: return
+        self.run_sync(Path(path) / self.db_path.name)
+
+    def run_sync(self, remote_path):
+        """执行同步并刷新数据"""
+        if remote_path.resolve() == self.db_path.resolve():
+            messagebox.showwarning("提示", "不能与当前数据库自身同步")
+            return
+
+        try:
+            pulled, pushed = sync_databases(self.db_path, remote_path)
+            self.load_data()
+            messagebox.showinfo("成功", f"同步完成：拉取 {pulled} 条变更，推送 {pushed} 条变更")
+        except Exception as e:
+            messagebox.showerror("错误", f"同步失败：{str(e)}")
+
 
 if __name__ == "__main__":
     root = tk.Tk()